@@ -0,0 +1,66 @@
+import datetime
+import os.path as os
+import pandas as pd
+import html_parser as hp
+import item_object as io
+import category_map as cm
+
+
+user_path = os.expanduser(r'~\Desktop')
+
+
+def build_archive(civicweb_files="All_of_Civic_Web.csv",
+                  master_html="blank.html",
+                  output="output.html",
+                  optimize=False,
+                  category_map=None):
+    """
+    Builds the archive html file without any prompts, see main.make_archive for the csv conventions
+    :param civicweb_files: The csv file containing the CivicWeb files
+    :param master_html: The html to build upon
+    :param output: The name of the output file, relative names are saved to the desktop
+    :param optimize: Minifies the output, fingerprints its name with the content hash and writes precompressed
+    .gz/.br files beside it
+    :param category_map: The raw -> canonical category map to use, by default the persistent map is updated and used
+    :return: The path of the output file
+    :raises FileNotFoundError: If the csv file or the master html can not be found
+    """
+    output = os.join(user_path, output)
+    try:
+        df = pd.read_csv(civicweb_files)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Unable to find the csv file containing CivicWeb files: {civicweb_files}")
+    # Spelling variants of a category are replaced by their canonical category before grouping
+    if category_map is None:
+        category_map = cm.canonicalize(df["Category"])
+    df["Category"] = [category_map[str(cat)] for cat in df["Category"]]
+    df = df.sort_values(by=["Date", "Category"], ignore_index=True)
+
+    edit_obj = hp.Editable(master_html)
+    items = io.ItemObject(df)
+
+    item_tag = edit_obj.get_tag("items")
+    category_selector_tag = edit_obj.get_tag("category-selector")
+    category_html = []
+    added = set()
+
+    for item in items:
+        name = item["Name"]
+        links = item["Links"]
+        # Creates a datetime object using the YYYYMMDD format
+        date = datetime.datetime.strptime(str(item["Date"]), "%Y%m%d")
+        category = item["Category"]
+        video = item["Video"]
+
+        category_html.append(hp.create_category_option(date, category))
+        hp.insert(item_tag, hp.make_tag(hp.create_item_container(name, category, date, links, video)))
+    category_html.sort(reverse=True)
+
+    for cat in category_html:
+        cat = cat.replace("\n", "")
+        if cat in added:
+            continue
+        else:
+            added.add(cat)
+            hp.insert(category_selector_tag, hp.make_tag(cat))
+    return edit_obj.export(output, minify=optimize, compress=optimize, fingerprint=optimize)
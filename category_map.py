@@ -0,0 +1,189 @@
+import csv
+import re
+import threading
+from collections import Counter
+
+# The persistent raw -> canonical map, this can be edited by hand to fix or split clusters
+default_map_path = "Category_Map.csv"
+# How similar the distinctive words of two categories need to be (fuzz.token_set_ratio) to be compared word by word
+default_threshold = 90
+# How similar two words need to be (fuzz.ratio) to count as the same word, this allows typos but not different
+# words (ex: 'Solid' and 'Liquid' score 55)
+word_threshold = 85
+# Words that do not tell categories apart (ex: 'Boundary Economic Development' and 'Boundary Economic Development
+# Committee' are the same category)
+generic_words = {"committee", "meeting", "meetings", "the", "of", "and"}
+# Keeps the map file consistent between threads, sites.py updates it from the main process before each build
+map_lock = threading.Lock()
+
+id_match_label = re.compile(r"\b(\w|\d+)\b")
+word_match = re.compile(r"[a-z0-9]+")
+
+
+def labels(cat):
+    """
+    Gets the single letter and number labels of a category (ex: the 'A' in 'Area A Town Hall Meeting')
+    :param cat: The category string
+    :return: A set of the labels in the category
+    """
+    return set(id_match_label.findall(str(cat).lower()))
+
+
+def words(cat):
+    """
+    Gets the distinctive words of a category, the generic words are dropped
+    :param cat: The category string
+    :return: A sorted tuple of the lower case words
+    """
+    return tuple(sorted(set(word_match.findall(str(cat).lower())) - generic_words))
+
+
+def same_words(a: tuple, b: tuple, scorer):
+    """
+    Checks that every word of each category has a matching word in the other
+    :param a: The words of the first category
+    :param b: The words of the second category
+    :param scorer: The fuzz.ratio function
+    :return: True if the categories have the same words allowing for typos
+    """
+    return (all(any(scorer(x, y) >= word_threshold for y in b) for x in a) and
+            all(any(scorer(x, y) >= word_threshold for x in a) for y in b))
+
+
+class UnionFind:
+    def __init__(self):
+        """
+        A disjoint set of keys used to cluster categories, keys are added when first used
+        """
+        self.parent = {}
+
+    def find(self, key):
+        """
+        Finds the root of a key with path halving
+        :param key: The key to find
+        :return: The root key of the cluster
+        """
+        self.parent.setdefault(key, key)
+        while self.parent[key] != key:
+            self.parent[key] = self.parent[self.parent[key]]
+            key = self.parent[key]
+        return key
+
+    def union(self, a, b):
+        """
+        Joins the clusters of two keys
+        :param a: The first key
+        :param b: The second key
+        :return: None
+        """
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[root_b] = root_a
+
+
+def load_map(path=default_map_path):
+    """
+    Loads the raw -> canonical category map
+    :param path: The path to the csv file with 'Raw,Canonical' columns
+    :return: A dict of raw categories to canonical categories, empty if the file does not exist
+    """
+    category_map = {}
+    try:
+        with open(path, newline="", encoding="utf8") as in_file:
+            for row in csv.DictReader(in_file):
+                category_map[row["Raw"]] = row["Canonical"]
+    except FileNotFoundError:
+        pass
+    return category_map
+
+
+def save_map(category_map: dict, path=default_map_path):
+    """
+    Saves the raw -> canonical category map sorted by canonical category so clusters can be edited together
+    :param category_map: A dict of raw categories to canonical categories
+    :param path: The path for the csv file
+    :return: None
+    """
+    with open(path, "w", newline="", encoding="utf8") as out_file:
+        writer = csv.writer(out_file)
+        writer.writerow(["Raw", "Canonical"])
+        for raw, canonical in sorted(category_map.items(), key=lambda kv: (kv[1], kv[0])):
+            writer.writerow([raw, canonical])
+
+
+def build_map(categories, category_map=None, threshold=default_threshold):
+    """
+    Clusters all of the distinct categories at once and extends the raw -> canonical map, only categories
+    missing from the map are compared
+    -------------------------------------------------------------------------------------------------------
+    Categories are compared by their distinctive words (see words()). Each new category is scored against every
+    other category in one batch with fuzz.token_set_ratio, the matches above the threshold are merged if every
+    word of each has a matching word in the other and they have the same single letter or number labels
+    (ex: 'Area A' and 'Area B' are never merged). A new category joins every cluster it matches with a union
+    find. Each cluster gets the canonical of its most common member (existing canonicals first, then by name)
+    and every member, existing ones included, is remapped to it.
+
+    :param categories: An iterable of raw category strings, repeats are used to pick the most common spelling
+    :param category_map: The existing raw -> canonical map, this is not modified
+    :param threshold: The fuzz token set ratio required to compare two categories word by word
+    :return: A new raw -> canonical dict covering every raw category
+    """
+    from fuzzywuzzy import fuzz, process
+
+    category_map = dict(category_map or {})
+    counts = Counter(str(cat) for cat in categories)
+    new = [cat for cat in counts if cat not in category_map]
+    if not new:
+        return category_map
+
+    clusters = UnionFind()
+    for raw, canonical in category_map.items():
+        clusters.union(canonical, raw)
+    # Distinctive words -> every raw and canonical category with them
+    members = {}
+    for cat in list(category_map) + list(category_map.values()) + new:
+        members.setdefault(words(cat), set()).add(cat)
+    choices = {" ".join(key): key for key in members}
+    for cat in new:
+        key = words(cat)
+        for other in members[key]:
+            if labels(other) == labels(cat):
+                clusters.union(cat, other)
+        if not key:
+            continue
+        for match, score in process.extractBests(" ".join(key), list(choices), processor=None,
+                                                 scorer=fuzz.token_set_ratio, score_cutoff=threshold, limit=None):
+            other_key = choices[match]
+            if other_key == key or not same_words(key, other_key, fuzz.ratio):
+                continue
+            for other in members[other_key]:
+                if labels(other) == labels(cat):
+                    clusters.union(cat, other)
+
+    groups = {}
+    for cat in clusters.parent:
+        groups.setdefault(clusters.find(cat), []).append(cat)
+    existing = set(category_map.values())
+    for group in groups.values():
+        candidates = [cat for cat in group if cat in existing] or group
+        canonical = min(candidates, key=lambda cat: (-counts[cat], cat))
+        for cat in group:
+            if cat in category_map or cat in counts:
+                category_map[cat] = canonical
+    return category_map
+
+
+def canonicalize(categories, path=default_map_path, threshold=default_threshold):
+    """
+    Loads the persistent map, adds any new categories to it and saves it
+    :param categories: An iterable of raw category strings
+    :param path: The path to the csv map
+    :param threshold: The fuzz token set ratio required to compare two categories word by word
+    :return: A dict mapping every raw category to its canonical category
+    """
+    with map_lock:
+        known = load_map(path)
+        category_map = build_map(categories, known, threshold)
+        if category_map != known:
+            save_map(category_map, path)
+    return category_map
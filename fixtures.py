@@ -0,0 +1,316 @@
+import gzip
+import json
+import os
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+from bs4 import BeautifulSoup
+from selenium.webdriver.common.by import By
+import selenium.common.exceptions as se
+
+# The root urls of the crawl as {"roots": ...} and every recorded folder page as {"url": ..., "html": ...} json
+# lines, each line is its own gzip member
+default_archive_path = "civicweb_fixtures.jsonl.gz"
+default_baseline_path = "benchmark_baseline.json"
+
+
+class Recorder:
+    def __init__(self, path=default_archive_path):
+        """
+        Records the folder pages visited by a crawl, each page is compressed on its own and flushed as soon as it is
+        saved so a failed or killed crawl keeps the pages visited before the failure
+        :param path: The path of the archive
+        """
+        self.path = path
+        self.out_file = open(path, "wb")
+        self.n = 0
+
+    def write(self, entry: dict):
+        """
+        Writes a line to the archive as its own gzip member
+        :param entry: The json serializable line
+        :return: None
+        """
+        line = json.dumps(entry) + "\n"
+        self.out_file.write(gzip.compress(line.encode("utf8"), compresslevel=9))
+        self.out_file.flush()
+
+    def save_roots(self, root_urls: dict):
+        """
+        Saves the root urls of the crawl so it can be replayed without them
+        :param root_urls: The root urls in dictionary form
+        :return: None
+        """
+        self.write({"roots": root_urls})
+
+    def save(self, url, html):
+        """
+        Saves a page to the archive
+        :param url: The url the page was requested with
+        :param html: The page source once its elements have loaded
+        :return: None
+        """
+        self.write({"url": url, "html": html})
+        self.n += 1
+
+    def close(self):
+        """
+        Closes the archive, closing it again does nothing
+        :return: None
+        """
+        if self.out_file.closed:
+            return
+        self.out_file.close()
+        print(f"Recorded {self.n} pages to {self.path}")
+
+
+def read_archive(path=default_archive_path):
+    """
+    Reads the lines of a recorded archive, a line cut off by a killed crawl is skipped
+    :param path: The path of the archive
+    :return: A generator of the line dicts
+    """
+    with open(path, "rb") as in_file:
+        data = in_file.read()
+    while data:
+        member = zlib.decompressobj(wbits=31)
+        try:
+            lines = member.decompress(data)
+        except zlib.error:
+            break
+        if not member.eof:
+            break
+        for line in lines.decode("utf8").splitlines():
+            yield json.loads(line)
+        data = member.unused_data
+
+
+def load_archive(path=default_archive_path):
+    """
+    Loads the pages of a recorded archive, if a url was recorded more than once the last page is kept
+    :param path: The path of the archive
+    :return: A dict of urls to page sources
+    """
+    return {entry["url"]: entry["html"] for entry in read_archive(path) if "url" in entry}
+
+
+def load_roots(path=default_archive_path):
+    """
+    Loads the root urls recorded in an archive
+    :param path: The path of the archive
+    :return: The root urls in dictionary form, empty if none were recorded
+    """
+    root_urls = {}
+    for entry in read_archive(path):
+        root_urls.update(entry.get("roots", {}))
+    return root_urls
+
+
+def select(tag, by, value):
+    """
+    Finds the tags matching a selenium locator
+    :param tag: The BeautifulSoup tag to search in
+    :param by: The selenium By strategy, only css selector, id and tag name are supported
+    :param value: The selector
+    :return: A list of tags
+    """
+    if by == By.CSS_SELECTOR:
+        return tag.select(value)
+    if by == By.ID:
+        return tag.find_all(id=value)
+    if by == By.TAG_NAME:
+        return tag.find_all(value)
+    raise se.InvalidSelectorException(f"Replay does not support locating by {by}")
+
+
+class ReplayElement:
+    def __init__(self, tag, driver):
+        """
+        A stand-in for a selenium WebElement backed by a recorded tag
+        :param tag: The BeautifulSoup tag
+        :param driver: The ReplayDriver the tag came from
+        """
+        self.tag = tag
+        self.driver = driver
+
+    @property
+    def text(self):
+        """
+        :return: The text of the tag with the whitespace collapsed, close to the rendered text selenium returns
+        """
+        return " ".join(self.tag.get_text().split())
+
+    def get_attribute(self, name):
+        """
+        :param name: The attribute name
+        :return: The attribute value, links are made absolute like selenium does
+        """
+        value = self.tag.get(name)
+        if isinstance(value, list):
+            value = " ".join(value)
+        if value is not None and name in ("href", "src"):
+            return urljoin(self.driver.current_url, value)
+        return value
+
+    def find_elements(self, by=By.ID, value=None):
+        return [ReplayElement(tag, self.driver) for tag in select(self.tag, by, value)]
+
+    def find_element(self, by=By.ID, value=None):
+        found = self.find_elements(by, value)
+        if not found:
+            raise se.NoSuchElementException(f"Unable to locate {value}")
+        return found[0]
+
+    def find_elements_by_css_selector(self, css_selector):
+        return self.find_elements(By.CSS_SELECTOR, css_selector)
+
+    def find_element_by_css_selector(self, css_selector):
+        return self.find_element(By.CSS_SELECTOR, css_selector)
+
+    def find_elements_by_tag_name(self, name):
+        return self.find_elements(By.TAG_NAME, name)
+
+
+class ReplayDriver(ReplayElement):
+    def __init__(self, pages):
+        """
+        A stand-in for the Firefox webdriver that serves the crawl from a recorded archive, the parsing functions
+        in scrape_civicweb run on it unchanged
+        :param pages: A dict of urls to page sources (see load_archive) or the path of an archive
+        """
+        if isinstance(pages, str):
+            pages = load_archive(pages)
+        self.pages = pages
+        self.current_url = None
+        self.page_source = ""
+        super().__init__(BeautifulSoup("", "html.parser"), self)
+
+    def get(self, url):
+        """
+        Opens a recorded page
+        :param url: The url of the page
+        :return: None
+        """
+        if url not in self.pages:
+            raise se.WebDriverException(f"{url} was not recorded")
+        self.current_url = url
+        self.page_source = self.pages[url]
+        self.tag = BeautifulSoup(self.page_source, "html.parser")
+
+    def refresh(self):
+        pass
+
+    def find_element_by_id(self, id_):
+        return self.find_element(By.ID, id_)
+
+    def quit(self):
+        pass
+
+
+def serve(path=default_archive_path, port=8000):
+    """
+    Serves a recorded archive as a local stand-in for CivicWeb, pages are matched by their path and query so the
+    crawl can be run in a browser against local_urls(root_urls, port)
+    :param path: The path of the archive
+    :param port: The port to serve on
+    :return: None, serves until interrupted
+    """
+    for key, url in local_urls(load_roots(path), port).items():
+        print(f"{key}: {url}")
+    pages = {}
+    for url, html in load_archive(path).items():
+        parts = urlsplit(url)
+        pages[urlunsplit(("", "", parts.path, parts.query, ""))] = html.encode("utf8")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            page = pages.get(self.path)
+            if page is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(page)))
+            self.end_headers()
+            self.wfile.write(page)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("localhost", port), Handler)
+    print(f"Serving {len(pages)} recorded pages on http://localhost:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+def local_urls(root_urls: dict, port=8000):
+    """
+    Points root urls at the local stand-in server
+    :param root_urls: The root urls in dictionary form
+    :param port: The port of the server
+    :return: The root urls on localhost
+    """
+    return {key: urlunsplit(("http", f"localhost:{port}") + urlsplit(url)[2:]) for key, url in root_urls.items()}
+
+
+def benchmark(path=default_archive_path, root_urls=None, baseline_path=default_baseline_path, tolerance=0.2):
+    """
+    Benchmarks the crawl and the name parsing offline from a recorded archive and checks for regressions
+    -----------------------------------------------------------------------------------------------------------
+    The first run saves the results as the baseline, later runs report any result more than tolerance slower
+    than the baseline. Delete the baseline file to reset it.
+
+    :param path: The path of the archive
+    :param root_urls: The root urls to crawl, by default the ones recorded in the archive
+    :param baseline_path: The path of the baseline json file
+    :param tolerance: The allowed slow down as a fraction of the baseline
+    :return: A dict of the results, 'regressions' lists the results more than tolerance slower than the baseline
+    :raises ValueError: If no root urls are given and none were recorded
+    """
+    import scrape_civicweb as sc
+
+    if root_urls is None:
+        root_urls = load_roots(path)
+    if not root_urls:
+        raise ValueError(f"No root urls were recorded in {path}, pass the root urls to replay")
+    pages = load_archive(path)
+
+    # The date and name caches would skip the work being measured
+    sc.get_doc_date.cache_clear()
+    sc.clean_name.cache_clear()
+    civ_web = sc.CivicWeb(driver=ReplayDriver(pages), metrics_path=None)
+    crawl = civ_web.get_files(root_urls)
+
+    names = sorted({" ".join(link.get_text().split()) for html in pages.values()
+                    for link in BeautifulSoup(html, "html.parser").select("a.document-link")})
+    start = time.perf_counter()
+    for name in names:
+        sc.get_doc_date.__wrapped__(name)
+        sc.clean_name.__wrapped__(name)
+    parse_seconds = time.perf_counter() - start
+
+    results = {"crawl_pages_per_second": crawl["pages_per_second"],
+               "parse_names_per_second": len(names) / parse_seconds if parse_seconds else 0.0,
+               "pages": crawl["pages"],
+               "names": len(names)}
+    print(f"Crawl: {results['crawl_pages_per_second']:.1f} pages/s, "
+          f"parse: {results['parse_names_per_second']:.1f} names/s")
+
+    if not os.path.exists(baseline_path):
+        with open(baseline_path, "w", encoding="utf8") as out_file:
+            json.dump(results, out_file, indent=2)
+        print(f"Saved the baseline to {baseline_path}")
+        results["regressions"] = []
+        return results
+    with open(baseline_path, encoding="utf8") as in_file:
+        baseline = json.load(in_file)
+    results["regressions"] = []
+    for key in ("crawl_pages_per_second", "parse_names_per_second"):
+        if results[key] < baseline[key] * (1 - tolerance):
+            print(f"Regression: {key} is {results[key]:.1f}, the baseline is {baseline[key]:.1f}")
+            results["regressions"].append(key)
+    return results
@@ -1,9 +1,22 @@
 from bs4 import BeautifulSoup
 import pandas as pd
 import datetime
+import hashlib
+import gzip
+import json
+import os
 import re
 
 simplify_match = re.compile(r"(\b[A-Z]\w{0,2})+")
+# Blocks where whitespace matters and are left untouched when minifying
+protected_match = re.compile(r"<(pre|script|style|textarea)\b.*?</\1\s*>", flags=re.IGNORECASE | re.DOTALL)
+# Comments, except for conditional comments
+comment_match = re.compile(r"<!--(?!\[if).*?-->", flags=re.DOTALL)
+whitespace_match = re.compile(r"\s+")
+# Whitespace between tags where the next tag is block level (or in the head), this whitespace is never rendered.
+# Inline and inline-block tags such as button, select and video are left out as the space between them is rendered
+block_gap_match = re.compile(r">\s+(?=</?(html|head|body|meta|link|title|div|table|thead|tbody|tr|th|td|p|h[1-6]|"
+                             r"ul|ol|li|hr|form|header|footer|nav|main|section|article)\b)", flags=re.IGNORECASE)
 
 
 def insert(parent_tag, added_tag, i=0):
@@ -152,11 +165,102 @@ def create_category_option(date: datetime, category: str):
     """
 
 
+def minify_html(html: str):
+    """
+    Minifies html by removing comments and collapsing whitespace to a single space, pre, script, style and textarea
+    blocks are left as they are
+    :param html: The html string to minify
+    :return: The minified html string
+    """
+    def minify_segment(segment):
+        segment = comment_match.sub("", segment)
+        return whitespace_match.sub(" ", block_gap_match.sub(">", segment))
+
+    result = []
+    last = 0
+    for block in protected_match.finditer(html):
+        result.append(minify_segment(html[last:block.start()]))
+        result.append(block.group(0))
+        last = block.end()
+    result.append(minify_segment(html[last:]))
+    return "".join(result).strip()
+
+
+def fingerprint_path(path: str, data: bytes):
+    """
+    Adds the content hash of the data to a file name so the file can be cached as immutable (ex: output.html ->
+    output.1a2b3c4d5e6f.html)
+    :param path: The path of the file
+    :param data: The contents of the file
+    :return: The fingerprinted path
+    """
+    root, ext = os.path.splitext(path)
+    return f"{root}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+
+def write_manifest(path: str, fingerprinted: str, compressed=()):
+    """
+    Writes a manifest beside a fingerprinted file telling the server which file is current (ex: output.manifest.json
+    containing {"output.html": "output.1a2b3c4d5e6f.html", "output.html.gz": ...}), the files listed by the previous
+    manifest that are no longer current are deleted
+    :param path: The stable path of the file
+    :param fingerprinted: The fingerprinted path of the file
+    :param compressed: The paths of the precompressed files
+    :return: The path of the manifest
+    """
+    name = os.path.basename(path)
+    manifest = {name: os.path.basename(fingerprinted)}
+    for compressed_path in compressed:
+        suffix = compressed_path[len(fingerprinted):]
+        manifest[name + suffix] = os.path.basename(compressed_path)
+    manifest_path = os.path.splitext(path)[0] + ".manifest.json"
+    try:
+        with open(manifest_path, encoding="utf8") as in_file:
+            old_manifest = json.load(in_file)
+    except (FileNotFoundError, ValueError):
+        old_manifest = {}
+    with open(manifest_path, "w", encoding="utf8") as out_file:
+        json.dump(manifest, out_file, indent=2)
+
+    folder = os.path.dirname(manifest_path)
+    for old_name in set(old_manifest.values()) - set(manifest.values()):
+        # Only names written by export are removed, a hand edited manifest can not point outside the folder
+        if os.path.basename(old_name) != old_name:
+            continue
+        try:
+            os.remove(os.path.join(folder, old_name))
+        except FileNotFoundError:
+            pass
+    return manifest_path
+
+
+def write_compressed(path: str, data: bytes):
+    """
+    Writes precompressed siblings of a file at the maximum compression level, path.gz always and path.br if
+    brotli is installed
+    :param path: The path of the uncompressed file
+    :param data: The contents of the file
+    :return: A list of the paths written
+    """
+    written = [path + ".gz"]
+    with open(path + ".gz", "wb") as out_file:
+        out_file.write(gzip.compress(data, compresslevel=9, mtime=0))
+    try:
+        import brotli
+    except ImportError:
+        return written
+    written.append(path + ".br")
+    with open(path + ".br", "wb") as out_file:
+        out_file.write(brotli.compress(data, quality=11))
+    return written
+
+
 class Editable:
     def __init__(self, edit_file: str):
         """
         Creates an editable html object
         :param edit_file: Path to the html file to edit
+        :raises FileNotFoundError: If the html file can not be found
         """
         self.edit_file = edit_file
         try:
@@ -164,9 +268,7 @@ class Editable:
                 self.soup = BeautifulSoup(in_file, "html.parser")
                 self.soup.encode("utf8")
         except FileNotFoundError:
-            print("Unable to find the master html")
-            quit()
-        in_file.close()
+            raise FileNotFoundError(f"Unable to find the master html: {self.edit_file}")
 
     def __str__(self):
         return self.soup.prettify(formatter="html")
@@ -174,22 +276,41 @@ class Editable:
     def __repr__(self):
         return repr(str(self.soup) + "\nLength \n" + str(len(self.soup)))
 
-    def export(self, file_out=None, pretty=False):
+    def export(self, file_out=None, pretty=False, minify=False, compress=False, fingerprint=False):
         """
         Exports the current edited html document
         :param file_out: The path for the file including filename(This will export to the original html file)
         :param pretty: Determines if the output is exported as pretty, pretty seems to causes some special
         characters to break
-        :return: Nothing, but exports the file
+        :param minify: Removes comments and repeated whitespace from the output
+        :param compress: Also writes precompressed .gz (and .br if brotli is installed) files beside the output
+        :param fingerprint: Adds the content hash to the file name so it can be served with immutable caching, the
+        current file is listed in '<name>.manifest.json' beside it
+        :return: The path of the exported file
         """
         if not file_out:
             file_out = self.edit_file
-        with open(file_out, "w") as out_file:
-            if pretty:
-                out_file.write(self.soup.prettify())
-            else:
-                out_file.write(str(self.soup.__repr__()))
-        out_file.close()
+        if not (minify or compress or fingerprint):
+            with open(file_out, "w") as out_file:
+                if pretty:
+                    out_file.write(self.soup.prettify())
+                else:
+                    out_file.write(str(self.soup.__repr__()))
+            return file_out
+
+        html = self.soup.prettify() if pretty else str(self.soup)
+        if minify:
+            html = minify_html(html)
+        data = html.encode("utf8")
+        stable = file_out
+        if fingerprint:
+            file_out = fingerprint_path(file_out, data)
+        with open(file_out, "wb") as out_file:
+            out_file.write(data)
+        compressed = write_compressed(file_out, data) if compress else []
+        if fingerprint:
+            write_manifest(stable, file_out, compressed)
+        return file_out
 
     def get_tag(self, html_id=None, html_tag_and_class=None, i=0):
         """
@@ -1,5 +1,4 @@
 import pandas as pd
-from fuzzywuzzy import fuzz
 
 
 def min_to_mins(name):
@@ -41,21 +40,19 @@ class ItemObject:
         """
         self.rows = []
         self.n = 0
-        # How exactly the categories need to be to be grouped
-        threshold = 80
 
         # Initialization
         # This will break if the df is not sorted by date primarily and category name secondly
         # It will also break if the panda dataframe does not have the correct column
+        # Categories are compared exactly, spelling variants should be canonicalized first (see category_map.py)
         pending = None
         for ind, row in df.iterrows():
             if pending is None:
                 pending = row_to_item(row)
             current = row_to_item(row)
-            r = fuzz.ratio(current["Category"], pending["Category"])
             if (current["Date"] == pending["Date"] and
                     current["Links"][0][1] != pending["Links"][0][1] and
-                    r > threshold):
+                    current["Category"] == pending["Category"]):
                 pending["Links"].append(current["Links"][0])
                 continue
             else:
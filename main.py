@@ -1,13 +1,56 @@
-import html_parser as hp
-import pandas as pd
-import item_object as io
-import scrape_civicweb as sc
-import datetime
-from fuzzywuzzy.fuzz import ratio
-import os.path as os
+import time
+import sys
+import os.path
+import subprocess
 
+# Start-up budget in seconds for a fresh interpreter to run 'help', heavy dependencies are only imported by the
+# commands using them
+STARTUP_BUDGET = 0.2
+HEAVY_MODULES = ("pandas", "bs4", "fuzzywuzzy", "selenium", "dateutil")
+# The heavy modules each command must not load: (command, module imported by the command, forbidden modules)
+STARTUP_RULES = (("help", None, HEAVY_MODULES),
+                 ("make", "archive", ("selenium",)))
 
-user_path = os.expanduser(r'~\Desktop')
+
+def measure_startup(command="help", module=None):
+    """
+    Measures the start-up of a command in a fresh interpreter, the wall time includes the interpreter start-up
+    :param command: The command to run once, ex: help
+    :param module: The module a command imports instead of running it (ex: archive for make, which would otherwise
+    build the archive)
+    :return: A tuple of (seconds, list of heavy modules loaded)
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    if module is None:
+        run = f"sys.argv = ['main.py', {command!r}]\nrunpy.run_path('main.py', run_name='__main__')\n"
+    else:
+        run = f"import main, {module}\n"
+    code = ("import runpy, sys\n" + run
+            + f"print('LOADED=' + ','.join(n for n in {HEAVY_MODULES!r} if n in sys.modules))\n")
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], cwd=here, capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - start
+    loaded = result.stdout.rsplit("LOADED=", 1)[1].strip()
+    return elapsed, [name for name in loaded.split(",") if name]
+
+
+def startup_report():
+    """
+    Measures the start-up of each command in STARTUP_RULES and prints the time and the heavy modules loaded
+    :return: True if 'help' is within STARTUP_BUDGET and no command loads a forbidden module
+    """
+    ok = True
+    for command, module, forbidden in STARTUP_RULES:
+        elapsed, loaded = measure_startup(command, module)
+        print(f"{command}: {elapsed * 1000:.1f}ms, heavy modules loaded: " + (", ".join(loaded) if loaded else "None"))
+        if command == "help" and elapsed > STARTUP_BUDGET:
+            print(f"{command}: start-up budget of {STARTUP_BUDGET * 1000:.0f}ms exceeded")
+            ok = False
+        for name in loaded:
+            if name in forbidden:
+                print(f"{command}: must not load {name}")
+                ok = False
+    return ok
 
 
 def make_table(path="table_output.html"):
@@ -16,9 +59,16 @@ def make_table(path="table_output.html"):
     :param path: The output path
     :return: None
     """
+    import pandas as pd
+    import html_parser as hp
+
     master_table_html = "table.html"
     df = pd.read_csv("Table_Edit.csv")
-    edit_obj = hp.Editable(master_table_html)
+    try:
+        edit_obj = hp.Editable(master_table_html)
+    except FileNotFoundError as e:
+        print(e)
+        quit()
     main_tag = edit_obj.get_tag("table_div")
     table = hp.make_tag(hp.table_from_df(df))
     hp.insert(parent_tag=main_tag, added_tag=table)
@@ -26,30 +76,36 @@ def make_table(path="table_output.html"):
     edit_obj.export(path, pretty=True)
 
 
-def cat_unique(added, cat):
+def make_archive(civicweb_files="All_of_Civic_Web.csv",
+                 master_html="blank.html",
+                 output="output.html",
+                 prompt=True,
+                 optimize=False):
     """
-    Checks if a category is unique by checking if the
-    :param added:
-    :param cat:
-    :return:
+    Makes the archive html file, explaining the csv conventions first
+    :param civicweb_files: The csv file containing the CivicWeb files
+    :param master_html: The html to build upon
+    :param output: The name of the output file, this will save to desktop
+    :param prompt: Prints the conventions and waits for enter, False for scheduled runs without a terminal
+    :param optimize: Minifies, fingerprints and precompresses the output (see archive.build_archive)
+    :return: None
     """
-    tmp = 0
-    for i in added:
-        r = ratio(cat.lower().replace(" ", ""), i.lower().replace(" ", ""))
-        if r > tmp:
-            tmp = r
-    return tmp != 100
-
+    import archive
 
-def make_archive(civicweb_files="All_of_Civic_Web.csv",
-                 master_html="blank.html",
-                 output="output.html"):
     if civicweb_files is None:
         civicweb_files = "All_of_Civic_Web.csv"
     if master_html is None:
         master_html = "blank.html"
     if output is None:
         output = "output.html"
+    if not prompt:
+        try:
+            archive.build_archive(civicweb_files, master_html, output, optimize)
+        except FileNotFoundError as e:
+            print(e)
+            quit(1)
+        print("Done!")
+        return
     print(""" 
     If you experience any errors with formatting in this file ensure that the CSV file is correct following the 
     following conventions(Do not label *Index* in the CSV):
@@ -68,53 +124,26 @@ def make_archive(civicweb_files="All_of_Civic_Web.csv",
     (AKA CivicWeb files need https://)
     - Date - The Date should be specified by YYYYMMDD
     - Category - The category not only will appear on the label of the accordions, but will also create a category for 
-    the filter, consequently if it is not the exact same category name it will create a new category
-    (ex. "Board of Directors" != "BOARD of Directors")
+    the filter, spelling variants are grouped into one category (ex. "BOARD of Directors" into "Board of Directors"
+    and "Boundary Economic Development Committee" into "Boundary Economic Development") using the map saved to
+    'Category_Map.csv', edit the Canonical column of this file to fix any wrong groupings
     - Video - This column can be left blank unless there is a video to add, it is important to not that a video must 
     have a button and cannot be a standalone video unless you code that yourself
     --------------------------------------------------------------------------------------------------------------------
     The resulting file will be saved to your desktop as 'output.html' by default unless specified otherwise
     """)
     input("Press enter to continue")
-    output = os.join(user_path, output)
     try:
-        df = pd.read_csv(civicweb_files).sort_values(by=["Date", "Category"], ignore_index=True)
-    except FileNotFoundError:
-        "Unable to find the csv file containing CivicWeb files"
+        archive.build_archive(civicweb_files, master_html, output, optimize)
+    except FileNotFoundError as e:
+        print(e)
         quit()
-
-    edit_obj = hp.Editable(master_html)
-    items = io.ItemObject(df)
-
-    item_tag = edit_obj.get_tag("items")
-    category_selector_tag = edit_obj.get_tag("category-selector")
-    category_html = []
-    added = []
-
-    for item in items:
-        name = item["Name"]
-        links = item["Links"]
-        # Creates a datetime object using the YYYYMMDD format
-        date = datetime.datetime.strptime(str(item["Date"]), "%Y%m%d")
-        category = item["Category"]
-        video = item["Video"]
-
-        category_html.append(hp.create_category_option(date, category))
-        hp.insert(item_tag, hp.make_tag(hp.create_item_container(name, category, date, links, video)))
-    category_html.sort(reverse=True)
-
-    for cat in category_html:
-        cat = cat.replace("\n", "")
-        if not cat_unique(added, cat):
-            continue
-        else:
-            added.append(cat)
-            hp.insert(category_selector_tag, hp.make_tag(cat))
-    edit_obj.export(output)
     print("Done!")
 
 
-def cleanup(df: pd.DataFrame):
+def cleanup(df):
+    import scrape_civicweb as sc
+
     for ind in range(len(df["Name"])):
         tmp = sc.clean_name(df.at[ind, "Name"])
         df.at[ind, "Name"] = tmp
@@ -123,10 +152,21 @@ def cleanup(df: pd.DataFrame):
 def scrape(path="scraped.csv", driver_path="geckodriver.exe",
            files={"Minute": "https://rdkb.civicweb.net/filepro/documents/270",
                   "Agenda": "https://rdkb.civicweb.net/filepro/documents/314"},
-           ):
-    civ_web = sc.CivicWeb()
-    civ_web.get_files(files)
-    civ_web.export(path)
+           record_path=None):
+    import scrape_civicweb as sc
+
+    recorder = None
+    if record_path is not None:
+        import fixtures
+        recorder = fixtures.Recorder(record_path)
+    try:
+        civ_web = sc.CivicWeb(recorder=recorder)
+        civ_web.get_files(files)
+        civ_web.export(path)
+    finally:
+        # Closed even if the crawl fails so the pages visited so far are kept
+        if recorder is not None:
+            recorder.close()
 
 
 if __name__ == '__main__':
@@ -143,6 +183,8 @@ if __name__ == '__main__':
     by default this is called All_of_Civic_Web.csv(ex:)
     - Master HTML File - The HTML to build upon, please retain the classes and id's present in this file
     - Output - The name of the output file, this will save to desktop
+    - optimize - Optional, minifies the output, adds its content hash to the file name and writes .gz/.br files
+    beside it, the current file name is listed in '<output>.manifest.json' (ex: make optimize)
     
     Command: scrape
     Scrapes Civic Web
@@ -153,9 +195,40 @@ if __name__ == '__main__':
     Creates a html table representing a csv file
     Parameters: None, edit the csv file titled 'Table_Edit.csv', and creates 'table_output.html' in the root directory
     of this program
+    
+    Command: startup
+    Runs help in a fresh interpreter and reports the start-up time against the budget, and checks that help and
+    make do not load heavy dependencies they do not need
+    Parameters: None
+    
+    Command: sites
+    Scrapes Civic Web and makes the archive for every site in a site configuration file concurrently
+    Parameters:
+    - Site File - The json file listing the sites, by default this is called sites.json
+    
+    Command: record
+    Scrapes Civic Web like scrape and also saves every visited folder page for replay
+    Parameters:
+    - Archive - Name of the archive saved, by default this is called civicweb_fixtures.jsonl.gz
+    
+    Command: replay
+    Benchmarks the scraping and the name parsing offline from a recorded archive and reports regressions against
+    benchmark_baseline.json (saved on the first run), the root urls recorded in the archive are crawled
+    Parameters:
+    - Archive - The recorded archive, by default this is called civicweb_fixtures.jsonl.gz
+    - serve - Serves the archive on http://localhost:8000 as a stand-in for Civic Web instead of benchmarking
+    When run once from the command line a regression exits with status 1
+    
+    Any command can also be run once without the prompt, ex: python main.py startup
+    Commands run this way skip the 'Press enter' and (y/n) confirmations so they can be scheduled
     """
+    # Commands passed on the command line are run once, for scheduled invocations
+    one_shot = len(sys.argv) > 1
     while True:
-        user = input("Please enter command ").split(" ")
+        if one_shot:
+            user = sys.argv[1:]
+        else:
+            user = input("Please enter command ").split(" ")
         if len(user) == 0:
             print(help_info)
         else:
@@ -163,7 +236,12 @@ if __name__ == '__main__':
                 print(help_info)
             if user[0].lower() == "quit":
                 quit()
+            if user[0].lower() == "startup":
+                if not startup_report() and one_shot:
+                    quit(1)
             if user[0].lower() == "make":
+                optimize = "optimize" in [u.lower() for u in user[1:]]
+                user = [u for u in user if u.lower() != "optimize"]
                 csv_name, master_html, output_html = None, None, None
                 try:
                     csv_name = user[1]
@@ -173,32 +251,55 @@ if __name__ == '__main__':
                     pass
                 if csv_name is None:
                     print("Making Archive")
-                    make_archive()
+                    make_archive(prompt=not one_shot, optimize=optimize)
                     break
                 if master_html is None:
                     print("Making Archive")
-                    make_archive(csv_name)
+                    make_archive(csv_name, prompt=not one_shot, optimize=optimize)
                 elif output_html is None:
                     print("Making Archive")
-                    make_archive(csv_name, master_html)
+                    make_archive(csv_name, master_html, prompt=not one_shot, optimize=optimize)
                 elif output_html is not None:
                     print("Making Archive")
-                    make_archive(csv_name, master_html, output_html)
+                    make_archive(csv_name, master_html, output_html, prompt=not one_shot, optimize=optimize)
             if user[0].lower() == "scrape":
                 print("""
                 Scraping Civic Web
                 This takes a long time and sometimes fails due to the limitations of the gecko driver.
                 Estimated completion time 20-30 minutes.
                 """)
-                confirmation = input("Are you sure you want to continue?(y/n) ")
+                # Scheduled runs have no terminal to confirm on, the command line is the confirmation
+                confirmation = "y" if one_shot else input("Are you sure you want to continue?(y/n) ")
                 if confirmation.lower() == "y":
                     print("Scraping Civic Web,\nthis may take a while...\n\nProgress:\n")
                     scrape()
                     print("Done!")
                 else:
                     print("Not scraping\n")
+            if user[0].lower() == "record":
+                import fixtures
+                archive_path = user[1] if len(user) > 1 else fixtures.default_archive_path
+                print("Scraping and recording Civic Web,\nthis may take a while...\n")
+                scrape(record_path=archive_path)
+                print("Done!")
+            if user[0].lower() == "replay":
+                import fixtures
+                archive_path = (user[1] if len(user) > 1 and user[1].lower() != "serve"
+                                else fixtures.default_archive_path)
+                if "serve" in [u.lower() for u in user[1:]]:
+                    fixtures.serve(archive_path)
+                elif fixtures.benchmark(archive_path)["regressions"] and one_shot:
+                    quit(1)
+            if user[0].lower() == "sites":
+                import sites
+                if len(user) > 1:
+                    sites.build_all(user[1])
+                else:
+                    sites.build_all()
             if user[0].lower() == "table":
                 if len(user) > 1:
                     make_table(user[1])
                 else:
                     make_table()
+        if one_shot:
+            break
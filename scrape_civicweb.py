@@ -1,4 +1,7 @@
 import datetime
+import functools
+import time
+from urllib.parse import urlsplit
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as ec
@@ -8,9 +11,7 @@ import selenium.common.exceptions as se
 from dateutil.parser import parse
 import pandas as pd
 import re
-
-PROGRESS = 0
-
+import telemetry as tm
 
 # Pre-compiled regex match objects for faster computation
 id_match_front = re.compile(r"(^ +)")
@@ -66,9 +67,10 @@ def get_doc_link(identifier):
     """
     Gets web link from the id number used to index Civic Web
     :param identifier: The number that civic web uses for indexing
-    :return: The absolute web link
+    :return: The absolute web link on the same CivicWeb site as the identifier
     """
-    return "https://rdkb.civicweb.net/document/" + str(id_match.match(identifier).group(1))
+    parts = urlsplit(identifier)
+    return f"{parts.scheme}://{parts.netloc}/document/" + str(id_match.match(identifier).group(1))
 
 
 def simplify_for_cat(name):
@@ -102,6 +104,7 @@ def is_pdf(link):
         return False
 
 
+@functools.lru_cache(maxsize=None)
 def clean_name(name: str):
     """
     Cleans the names of files by removing and adding portions of text from the original name
@@ -119,13 +122,14 @@ def clean_name(name: str):
 
 def clean_cat(cat):
     """
-    Removes any additional info from the category string
+    Removes any additional info after a ' - ' from the category string, hyphenated words are kept
     :param cat: The category string
-    :return: The cleaned category string
+    :return: The cleaned category string without the surrounding whitespace
     """
-    return cat.split("-")[0]
+    return cat.split(" - ")[0].strip()
 
 
+@functools.lru_cache(maxsize=None)
 def get_doc_date(text):
     """
     Gets the date from a file name
@@ -178,66 +182,132 @@ def make_file_obj(link, driver, key):
     return new_entry
 
 
-def get_files(wait, driver, key):
+def timed_wait(wait, locator, telemetry=None):
+    """
+    Waits for all elements matching the locator and records the time taken
+    :param wait: The wait object for waiting for the elements to load
+    :param locator: The (By, selector) tuple
+    :param telemetry: The CrawlTelemetry of the crawl, or None
+    :return: None
+    """
+    start = time.perf_counter()
+    try:
+        wait.until(ec.presence_of_all_elements_located(locator))
+    finally:
+        if telemetry is not None:
+            telemetry.wait(time.perf_counter() - start)
+
+
+def retry(driver, telemetry=None):
+    """
+    Refreshes the page after a timeout and records the timeout
+    :param driver: The Webdriver to refresh
+    :param telemetry: The CrawlTelemetry of the crawl, or None
+    :return: None
+    """
+    start = time.perf_counter()
+    driver.refresh()
+    if telemetry is not None:
+        telemetry.timeout(time.perf_counter() - start)
+
+
+def get_files(wait, driver, key, telemetry=None):
     """
     Gets the departments and solves loading errors recursively
     :param key: The key for the urls dictating if the file is an agenda or minute
     :param wait: The wait object for waiting for the elements to load
     :param driver: The Webdriver to get the elements from
+    :param telemetry: The CrawlTelemetry recording the page, or None
     :return: The links from the year to the departments
     """
     try:
-        wait.until(ec.presence_of_all_elements_located((By.CSS_SELECTOR, "div.document-link-container")))
-        wait.until(ec.presence_of_all_elements_located((By.ID, "document-bread-crumbs")))
+        timed_wait(wait, (By.CSS_SELECTOR, "div.document-link-container"), telemetry)
+        timed_wait(wait, (By.ID, "document-bread-crumbs"), telemetry)
         doc_container = [doc for doc in driver.find_elements_by_css_selector("div.document-link-container")]
         if len(doc_container) <= 1:
+            if telemetry is not None:
+                telemetry.documents(len(doc_container), 0)
             return None
         files = []
         for link in doc_container:
             if is_pdf(link):
                 files.append(make_file_obj(link, driver, key))
-                global PROGRESS
-                PROGRESS += 1
-                print(str((PROGRESS / 1267) * 100) + "%")
+        if telemetry is not None:
+            telemetry.documents(len(doc_container), len(files))
         return files
     except se.TimeoutException:
-        driver.refresh()
-        return get_files(wait, driver, key)
+        retry(driver, telemetry)
+        return get_files(wait, driver, key, telemetry)
 
 
-def get_departments(wait, driver):
+def get_departments(wait, driver, telemetry=None):
     """
     Gets the departments and solves loading errors recursively
     :param wait: The wait object for waiting for the elements to load
     :param driver: The Webdriver to get the elements from
+    :param telemetry: The CrawlTelemetry recording the page, or None
     :return: The links from the year to the departments
     """
     try:
-        wait.until(ec.presence_of_all_elements_located((By.CSS_SELECTOR, "a.folder-link")))
+        timed_wait(wait, (By.CSS_SELECTOR, "a.folder-link"), telemetry)
         year_pages = [link.get_attribute("href") for link in driver.find_elements_by_css_selector("a.folder-link")]
         if len(year_pages) <= 1:
             return None
         return year_pages[1:]
     except se.TimeoutException:
-        driver.refresh()
-        return get_departments(wait, driver)
+        retry(driver, telemetry)
+        return get_departments(wait, driver, telemetry)
     except:
         print("Unknown Exception")
         return None
 
 
 class CivicWeb:
-    def __init__(self, driver_path="C:\\Users\\cdudek\\geckodriver\\geckodriver.exe"):
+    def __init__(self, driver_path="C:\\Users\\cdudek\\geckodriver\\geckodriver.exe",
+                 metrics_path=tm.default_metrics_path, driver=None, recorder=None, folder_cache=None):
         """
         A object created to find all of the civic web files to store in a pd dataframe or a csv file,
         this will often need cleaning
         :param driver_path:
+        :param metrics_path: The json lines file the crawl metrics are appended to, None to only print progress
+        :param driver: A webdriver to use instead of starting Firefox (ex: fixtures.ReplayDriver to crawl offline)
+        :param recorder: A fixtures.Recorder to save every visited folder page to, or None, the caller closes it
+        :param folder_cache: A dict of the files found in each (folder url, key) to share between the crawls of one
+        run (see sites.build_all), by default folders are only cached for this object
         """
-        opt = Options()
-        opt.add_argument("--headless")
-        opt.add_argument("--disable-extensions")
-        self.driver = webdriver.Firefox(executable_path=driver_path, options=opt)
+        if driver is None:
+            opt = Options()
+            opt.add_argument("--headless")
+            opt.add_argument("--disable-extensions")
+            driver = webdriver.Firefox(executable_path=driver_path, options=opt)
+        self.driver = driver
         self.df = pd.DataFrame()
+        self.metrics_path = metrics_path
+        self.telemetry = None
+        self.recorder = recorder
+        self.current = None
+        self.folder_cache = {} if folder_cache is None else folder_cache
+
+    def load(self, folder, kind):
+        """
+        Loads a folder page and records the load time
+        :param folder: The folder url
+        :param kind: The level of the folder ('root', 'year' or 'department')
+        :return: None
+        """
+        start = time.perf_counter()
+        self.driver.get(folder)
+        self.current = folder
+        self.telemetry.load(folder, kind, time.perf_counter() - start)
+
+    def page_done(self):
+        """
+        Finishes the current page once its elements have loaded, recording it if there is a recorder
+        :return: None
+        """
+        self.telemetry.page_done()
+        if self.recorder is not None:
+            self.recorder.save(self.current, self.driver.page_source)
 
     def get_files(self, root_urls: dict):
         """
@@ -245,37 +315,57 @@ class CivicWeb:
         :param root_urls: The root urls in dictionary form (ex:
         {"Minute":"https://rdkb.civicweb.net/filepro/documents/270",
         "Agenda":"https://rdkb.civicweb.net/filepro/documents/314"})
-        :return:
+        :return: The summary of the crawl metrics
         """
         wait = WebDriverWait(driver=self.driver, timeout=10)
+        rows = []
+        self.telemetry = tm.CrawlTelemetry(self.metrics_path, " ".join(root_urls.values()))
+        if self.recorder is not None:
+            self.recorder.save_roots(root_urls)
+        # The year folders of every root are found first so the ETA covers the whole tree
+        root_pages = {}
         for url in root_urls.keys():
             # This gets the root page specified by root_urls
-            self.driver.get(root_urls[url])
-            wait.until(ec.presence_of_all_elements_located((By.CSS_SELECTOR, "a.folder-link")))
-            root_page = [link.get_attribute("href") for link in
-                         self.driver.find_elements_by_css_selector("a.folder-link")]
+            self.load(root_urls[url], "root")
+            timed_wait(wait, (By.CSS_SELECTOR, "a.folder-link"), self.telemetry)
+            root_pages[url] = [link.get_attribute("href") for link in
+                               self.driver.find_elements_by_css_selector("a.folder-link")]
+            self.page_done()
+            self.telemetry.add_years(len(root_pages[url]))
 
-            for year_file in root_page:
+        for url in root_urls.keys():
+            for year_file in root_pages[url]:
                 # This gets the year/departments page from the root url
-                self.driver.get(year_file)
-                year_pages = get_departments(wait, self.driver)
+                self.load(year_file, "year")
+                year_pages = get_departments(wait, self.driver, self.telemetry)
+                self.page_done()
 
                 if year_pages is None:
+                    self.telemetry.year_done(0)
                     continue
+                self.telemetry.year_done(len(year_pages))
 
                 self.driver.refresh()
 
                 for department_folder in year_pages:
-                    # This gets the file page from the department page
-                    self.driver.get(department_folder)
-                    files = get_files(wait, self.driver, url)
+                    if (department_folder, url) in self.folder_cache:
+                        files = self.folder_cache[(department_folder, url)]
+                    else:
+                        # This gets the file page from the department page
+                        self.load(department_folder, "department")
+                        files = get_files(wait, self.driver, url, self.telemetry)
+                        self.page_done()
+                        self.folder_cache[(department_folder, url)] = files
+                    self.telemetry.department_done()
 
                     if files is None:
                         continue
 
-                    # Adds to the dataframe
-                    tmp_df = pd.DataFrame(files)
-                    self.df = self.df.append(tmp_df, ignore_index=True)
+                    rows.extend(files)
+
+        # Adds to the dataframe once, appending a dataframe per folder copies every earlier row each time
+        self.df = pd.concat([self.df, pd.DataFrame(rows)], ignore_index=True)
+        return self.telemetry.summary()
 
     def export(self, path="All_of_Civic_Web.csv"):
         """
@@ -0,0 +1,154 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+default_sites_path = "sites.json"
+# Defaults used for any setting missing from a site, 'csv' and 'output' default to '<name>.csv' and '<name>.html'
+site_defaults = {
+    "root_urls": {"Minute": "https://rdkb.civicweb.net/filepro/documents/270",
+                  "Agenda": "https://rdkb.civicweb.net/filepro/documents/314"},
+    "master_html": "blank.html",
+    "scrape": True,
+    "optimize": False,
+}
+
+
+def load_sites(path=default_sites_path):
+    """
+    Loads the site configuration file
+    -------------------------------------------------------------------------------------------------------------
+    The file is json with a 'sites' list, each site has a 'name' and optionally 'root_urls', 'csv', 'master_html',
+    'output', 'driver_path', 'scrape' (set to false to build from an existing csv) and 'optimize' (minified,
+    fingerprinted and precompressed output, see html_parser.Editable.export). The global budget is set by
+    'connections' (browsers crawling at once) and 'cpus' (archives built at once, each in its own process)
+
+    :param path: The path to the json file
+    :return: A tuple of (list of site dicts with the defaults filled in, connections, cpus)
+    :raises ValueError: If two sites would write to the same csv or output file
+    """
+    with open(path, encoding="utf8") as in_file:
+        config = json.load(in_file)
+    sites = []
+    for site in config["sites"]:
+        full = dict(site_defaults)
+        full["driver_path"] = config.get("driver_path")
+        full["csv"] = site["name"] + ".csv"
+        full["output"] = site["name"] + ".html"
+        full.update(site)
+        sites.append(full)
+    for key in ("csv", "output"):
+        paths = [os.path.normcase(os.path.abspath(site[key])) for site in sites]
+        for site, site_path in zip(sites, paths):
+            if paths.count(site_path) > 1:
+                raise ValueError(f"More than one site uses the {key} file {site[key]}")
+    connections = config.get("connections", 2)
+    cpus = config.get("cpus", os.cpu_count() or 1)
+    return sites, connections, cpus
+
+
+def crawl_site(site, folder_cache=None):
+    """
+    Scrapes the root urls of a site into its csv file, the browser is closed even if the crawl fails
+    :param site: The site dict
+    :param folder_cache: The folder cache shared by the crawls of one run (see scrape_civicweb.CivicWeb)
+    :return: The site dict
+    """
+    import scrape_civicweb as sc
+
+    if site["driver_path"]:
+        civ_web = sc.CivicWeb(site["driver_path"], folder_cache=folder_cache)
+    else:
+        civ_web = sc.CivicWeb(folder_cache=folder_cache)
+    try:
+        civ_web.get_files(site["root_urls"])
+    except BaseException:
+        civ_web.driver.quit()
+        raise
+    civ_web.export(site["csv"])
+    return site
+
+
+def site_category_map(site):
+    """
+    Updates the persistent category map with the categories of a site, this is done in the main process so only
+    one process writes the map
+    :param site: The site dict
+    :return: A dict mapping every raw category of the site to its canonical category
+    """
+    import pandas as pd
+    import category_map as cm
+
+    return cm.canonicalize(pd.read_csv(site["csv"])["Category"])
+
+
+def build_site(site, category_map):
+    """
+    Builds the archive of a site from its csv file
+    :param site: The site dict
+    :param category_map: The category map from site_category_map
+    :return: The path of the output file
+    """
+    import archive
+
+    return archive.build_archive(site["csv"], site["master_html"], site["output"], site["optimize"],
+                                 category_map)
+
+
+def submit_build(builders, site):
+    """
+    Submits the build of a site
+    :param builders: The executor running the builds
+    :param site: The site dict
+    :return: The future of the build, or None if its category map could not be made
+    """
+    try:
+        category_map = site_category_map(site)
+    except Exception as e:
+        print(f"Unable to build {site['name']}: {e}")
+        return None
+    return builders.submit(build_site, site, category_map)
+
+
+def build_all(path=default_sites_path):
+    """
+    Crawls and builds every site in the site configuration file, each site is built as soon as its crawl finishes
+    -------------------------------------------------------------------------------------------------------------
+    Crawls run in threads so the date and name caches and the crawled folder results of this run are shared by
+    every site, builds are CPU bound and run in processes so 'cpus' of them can run in parallel
+
+    :param path: The path to the json file
+    :return: A dict of site names to output paths
+    """
+    sites, connections, cpus = load_sites(path)
+    outputs = {}
+    folder_cache = {}
+    with ThreadPoolExecutor(max_workers=connections) as crawlers, ProcessPoolExecutor(max_workers=cpus) as builders:
+        crawls = {}
+        builds = {}
+        for site in sites:
+            if site["scrape"]:
+                crawls[crawlers.submit(crawl_site, site, folder_cache)] = site
+            else:
+                future = submit_build(builders, site)
+                if future is not None:
+                    builds[future] = site
+        for future in as_completed(crawls):
+            site = crawls[future]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Unable to scrape {site['name']}: {e}")
+                continue
+            print(f"Scraped {site['name']}")
+            future = submit_build(builders, site)
+            if future is not None:
+                builds[future] = site
+        for future in as_completed(builds):
+            site = builds[future]
+            try:
+                outputs[site["name"]] = future.result()
+            except Exception as e:
+                print(f"Unable to build {site['name']}: {e}")
+                continue
+            print(f"Built {site['name']} to {outputs[site['name']]}")
+    return outputs
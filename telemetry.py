@@ -0,0 +1,261 @@
+import json
+import threading
+import time
+
+default_metrics_path = "crawl_metrics.jsonl"
+# Upper bounds in seconds of the latency histogram buckets, the last bucket holds everything slower
+default_buckets = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+# Several crawls can write to the same metrics file (see sites.py)
+write_lock = threading.Lock()
+
+
+class Histogram:
+    def __init__(self, buckets=default_buckets):
+        """
+        A latency histogram with fixed buckets
+        :param buckets: The upper bounds of the buckets in seconds
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        """
+        Adds a measurement to the histogram
+        :param seconds: The latency in seconds
+        :return: None
+        """
+        i = 0
+        while i < len(self.buckets) and seconds > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def to_dict(self):
+        """
+        :return: A json serializable dict of the histogram, bucket keys are 'le_<upper bound>' and 'inf'
+        """
+        keys = [f"le_{b}" for b in self.buckets] + ["inf"]
+        return {"count": self.count,
+                "mean": self.total / self.count if self.count else 0.0,
+                "max": self.max,
+                "buckets": dict(zip(keys, self.counts))}
+
+
+def format_seconds(seconds):
+    """
+    Formats seconds as H:MM:SS
+    :param seconds: The number of seconds
+    :return: The formatted string
+    """
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+class CrawlTelemetry:
+    def __init__(self, path=default_metrics_path, source=""):
+        """
+        Records the metrics of a crawl and writes them to a json lines file, one line per page, progress update and
+        a summary at the end of the crawl
+        -----------------------------------------------------------------------------------------------------------
+        A telemetry object follows one driver, load() starts a page and the waits, timeouts and documents recorded
+        after it belong to that page until page_done() writes it
+
+        :param path: The path to the json lines file, None to only print the progress
+        :param source: A label for the crawl written with every line (ex: the root urls)
+        """
+        self.path = path
+        self.source = source
+        self.start = time.perf_counter()
+        self.pages = 0
+        self.load_latency = Histogram()
+        self.wait_latency = Histogram()
+        # Per folder url: timeouts (each one is retried with a refresh), documents found and pdfs kept
+        self.folders = {}
+        self.page = None
+        # The discovered folder tree, used for the ETA
+        self.years_total = 0
+        self.years_done = 0
+        self.departments_found = 0
+        self.departments_done = 0
+
+    def write(self, event: str, **fields):
+        """
+        Writes a line to the metrics file
+        :param event: The event name
+        :param fields: The fields of the line
+        :return: None
+        """
+        if self.path is None:
+            return
+        line = {"time": time.time(), "event": event, "source": self.source}
+        line.update(fields)
+        with write_lock:
+            with open(self.path, "a", encoding="utf8") as out_file:
+                out_file.write(json.dumps(line) + "\n")
+
+    def folder(self, url):
+        """
+        :param url: The folder url
+        :return: The stats dict of the folder
+        """
+        return self.folders.setdefault(url, {"timeouts": 0, "found": 0, "kept": 0})
+
+    def load(self, url, kind, seconds):
+        """
+        Records a page load and starts the page
+        :param url: The folder url
+        :param kind: The level of the folder ('root', 'year' or 'department')
+        :param seconds: The time taken by driver.get
+        :return: None
+        """
+        self.page = {"folder": url, "kind": kind, "load": seconds, "wait": 0.0, "timeouts": 0, "found": 0, "kept": 0}
+
+    def wait(self, seconds):
+        """
+        Records time spent waiting for the elements of the current page
+        :param seconds: The time taken by the wait
+        :return: None
+        """
+        if self.page is not None:
+            self.page["wait"] += seconds
+
+    def timeout(self, refresh_seconds):
+        """
+        Records a timeout on the current page and the refresh used to retry it
+        :param refresh_seconds: The time taken by the refresh
+        :return: None
+        """
+        if self.page is None:
+            return
+        self.page["timeouts"] += 1
+        self.page["load"] += refresh_seconds
+        stats = self.folder(self.page["folder"])
+        stats["timeouts"] += 1
+
+    def documents(self, found, kept):
+        """
+        Records the documents on the current page
+        :param found: The number of documents on the page
+        :param kept: The number of pdfs kept
+        :return: None
+        """
+        if self.page is None:
+            return
+        self.page["found"] += found
+        self.page["kept"] += kept
+        stats = self.folder(self.page["folder"])
+        stats["found"] += found
+        stats["kept"] += kept
+
+    def page_done(self):
+        """
+        Writes the current page and adds its latencies to the histograms
+        :return: None
+        """
+        if self.page is None:
+            return
+        self.pages += 1
+        self.load_latency.add(self.page["load"])
+        self.wait_latency.add(self.page["wait"])
+        self.write("page", **self.page)
+        self.page = None
+
+    def add_years(self, n):
+        """
+        Records year folders found on a root page
+        :param n: The number of year folders
+        :return: None
+        """
+        self.years_total += n
+
+    def year_done(self, departments):
+        """
+        Records a visited year folder
+        :param departments: The number of department folders found in the year
+        :return: None
+        """
+        self.years_done += 1
+        self.departments_found += departments
+
+    def department_done(self):
+        """
+        Records a finished department folder and prints the progress
+        :return: None
+        """
+        self.departments_done += 1
+        self.progress()
+
+    def elapsed(self):
+        """
+        :return: The seconds since the crawl started
+        """
+        return time.perf_counter() - self.start
+
+    def estimated_departments(self):
+        """
+        Estimates the number of department folders from the folders discovered so far, years that have not been
+        visited are assumed to have the average number of departments of the visited years
+        :return: The estimated number of department folders
+        """
+        if self.years_done == 0:
+            return self.departments_found
+        per_year = self.departments_found / self.years_done
+        return self.departments_found + per_year * (self.years_total - self.years_done)
+
+    def eta(self):
+        """
+        :return: The estimated seconds remaining, None until a department folder is finished
+        """
+        if self.departments_done == 0:
+            return None
+        remaining = max(self.estimated_departments() - self.departments_done, 0)
+        return self.elapsed() / self.departments_done * remaining
+
+    def progress(self):
+        """
+        Prints and writes the progress of the crawl
+        :return: None
+        """
+        elapsed = self.elapsed()
+        eta = self.eta()
+        total = self.estimated_departments()
+        fields = {"elapsed": elapsed,
+                  "pages_per_second": self.pages / elapsed if elapsed else 0.0,
+                  "departments_done": self.departments_done,
+                  "departments_estimated": total,
+                  "years_done": self.years_done,
+                  "years_total": self.years_total,
+                  "eta": eta}
+        self.write("progress", **fields)
+        print(f"{self.departments_done}/{round(total)} folders "
+              f"({self.years_done}/{self.years_total} years), "
+              f"{fields['pages_per_second']:.2f} pages/s, "
+              f"ETA {format_seconds(eta) if eta is not None else 'unknown'}")
+
+    def summary(self):
+        """
+        Writes and prints the summary of the crawl
+        :return: The summary dict
+        """
+        elapsed = self.elapsed()
+        summary = {"elapsed": elapsed,
+                   "pages": self.pages,
+                   "pages_per_second": self.pages / elapsed if elapsed else 0.0,
+                   "load_latency": self.load_latency.to_dict(),
+                   "wait_latency": self.wait_latency.to_dict(),
+                   "timeouts": sum(stats["timeouts"] for stats in self.folders.values()),
+                   "documents_found": sum(stats["found"] for stats in self.folders.values()),
+                   "pdfs_kept": sum(stats["kept"] for stats in self.folders.values()),
+                   "folders": self.folders}
+        self.write("summary", **summary)
+        print(f"Crawled {summary['pages']} pages in {format_seconds(elapsed)} "
+              f"({summary['pages_per_second']:.2f} pages/s), "
+              f"{summary['pdfs_kept']}/{summary['documents_found']} documents kept, "
+              f"{summary['timeouts']} timeouts")
+        return summary
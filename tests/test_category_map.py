@@ -0,0 +1,65 @@
+import os
+
+import pandas as pd
+
+import archive
+import category_map as cm
+
+repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+solid = "Solid Waste Management Plan Steering Committee"
+liquid = "Liquid Waste Management Plan Steering Committee"
+
+
+def test_similar_committees_are_not_merged():
+    category_map = cm.build_map([solid, solid, liquid])
+    assert category_map[solid] == solid
+    assert category_map[liquid] == liquid
+
+
+def test_spelling_variants_are_merged():
+    category_map = cm.build_map(["BOARD of Directors", "Board of Directors", "Board of  Directors ",
+                                 "Board of Directors"])
+    assert set(category_map.values()) == {"Board of Directors"}
+
+
+def test_generic_words_are_ignored():
+    category_map = cm.build_map(["Boundary Economic Development", "Boundary Economic Development",
+                                 "Boundary Economic Development Committee", "Boundary Economic Developement"])
+    assert set(category_map.values()) == {"Boundary Economic Development"}
+
+
+def test_labels_are_never_merged():
+    category_map = cm.build_map(["Area A Town Hall Meeting", "Area B Town Hall Meeting", "Area A Town Hall"])
+    assert category_map["Area A Town Hall"] == category_map["Area A Town Hall Meeting"]
+    assert category_map["Area A Town Hall Meeting"] != category_map["Area B Town Hall Meeting"]
+
+
+def test_merged_clusters_are_remapped_to_one_canonical():
+    known = {"Board of Directors": "Board of Directors", "BOARD OF DIRECTORS": "Directors Board"}
+    for _ in range(3):
+        category_map = cm.build_map(["board of directors", "Board of Directors", "Board of Directors"], known)
+        assert category_map == {"Board of Directors": "Board of Directors",
+                                "BOARD OF DIRECTORS": "Board of Directors",
+                                "board of directors": "Board of Directors"}
+
+
+def test_only_new_categories_change_the_map(tmp_path):
+    path = str(tmp_path / "map.csv")
+    first = cm.canonicalize([solid, liquid], path)
+    assert cm.canonicalize([solid, liquid], path) == first
+    assert cm.load_map(path) == first
+
+
+def test_archive_grouping_does_not_regress(tmp_path):
+    csv_path = os.path.join(repo, "All_of_Civic_Web.csv")
+    category_map = cm.build_map(pd.read_csv(csv_path)["Category"])
+    assert (category_map["Boundary Economic Development Committee"] ==
+            category_map["Boundary Economic Development"])
+    assert category_map[solid] != category_map[liquid]
+
+    output = archive.build_archive(csv_path, os.path.join(repo, "Blank.html"), str(tmp_path / "archive.html"),
+                                   category_map=category_map)
+    with open(output, encoding="utf8") as in_file:
+        items = in_file.read().count('<div class="container-fluid w3-round-xlarge category-')
+    # The number of items built before the categories were canonicalized
+    assert items <= 765
@@ -0,0 +1,77 @@
+import json
+import os
+
+import fixtures as fx
+import scrape_civicweb as sc
+
+archive = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "civicweb_fixtures.jsonl.gz")
+
+
+def test_benchmark_runs_offline(tmp_path, capsys):
+    baseline = str(tmp_path / "baseline.json")
+    results = fx.benchmark(archive, baseline_path=baseline)
+    # 2 roots, 4 years and 8 departments
+    assert results["pages"] == 14
+    # 16 documents with 14 distinct names, each name is parsed once
+    assert results["names"] == 14
+    assert results.pop("regressions") == []
+    with open(baseline) as in_file:
+        assert json.load(in_file) == results
+
+    assert fx.benchmark(archive, baseline_path=baseline, tolerance=1)["regressions"] == []
+    assert "Regression" not in capsys.readouterr().out
+
+
+def test_benchmark_returns_regressions(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"crawl_pages_per_second": 1e12, "parse_names_per_second": 0}))
+    results = fx.benchmark(archive, baseline_path=str(baseline))
+    assert results["regressions"] == ["crawl_pages_per_second"]
+
+
+def test_recorded_crawl_replays_with_its_roots(tmp_path):
+    path = str(tmp_path / "archive.jsonl.gz")
+    recorder = fx.Recorder(path)
+    sc.CivicWeb(driver=fx.ReplayDriver(archive), metrics_path=None, recorder=recorder).get_files(
+        fx.load_roots(archive))
+    recorder.close()
+    assert fx.load_roots(path) == fx.load_roots(archive)
+    assert fx.load_archive(path) == fx.load_archive(archive)
+
+
+def test_replay_crawl_collects_pdfs():
+    civ_web = sc.CivicWeb(driver=fx.ReplayDriver(archive), metrics_path=None)
+    summary = civ_web.get_files(fx.load_roots(archive))
+    # Folders with one document are skipped, the two pdfs of each board folder are kept
+    assert len(civ_web.df) == 8
+    assert set(civ_web.df["Agenda/Minute"]) == {"Minute", "Agenda"}
+    assert civ_web.df["Link"].str.startswith("https://rdkb.civicweb.net/document/").all()
+    assert summary["documents_found"] == 16
+    assert summary["pdfs_kept"] == 8
+
+
+def test_recorder_keeps_pages_without_close(tmp_path):
+    path = str(tmp_path / "archive.jsonl.gz")
+    recorder = fx.Recorder(path)
+    for i in range(3):
+        recorder.save(f"https://example.com/{i}", f"<p>{i}</p>")
+    # Simulates a killed crawl, the recorder is never closed and the last page is cut off
+    with open(path, "ab") as out_file:
+        out_file.write(b"\x1f\x8b\x08\x00")
+    assert fx.load_archive(path) == {f"https://example.com/{i}": f"<p>{i}</p>" for i in range(3)}
+    recorder.close()
+
+
+def test_folder_cache_is_only_shared_when_passed():
+    for _ in range(2):
+        civ_web = sc.CivicWeb(driver=fx.ReplayDriver(archive), metrics_path=None)
+        civ_web.get_files(fx.load_roots(archive))
+        assert len(civ_web.df) == 8
+
+    folder_cache = {}
+    for pages in (14, 6):
+        civ_web = sc.CivicWeb(driver=fx.ReplayDriver(archive), metrics_path=None, folder_cache=folder_cache)
+        summary = civ_web.get_files(fx.load_roots(archive))
+        # The department folders are only loaded by the first crawl
+        assert summary["pages"] == pages
+        assert len(civ_web.df) == 8
@@ -0,0 +1,52 @@
+import gzip
+import json
+import os
+
+import html_parser as hp
+
+
+def test_minify_keeps_space_between_inline_tags():
+    html = "<div>\n  <button>A</button>\n  <button>B</button>\n  <select>\n <option>1</option>\n</select>\n</div>"
+    assert hp.minify_html(html) == "<div> <button>A</button> <button>B</button> <select> <option>1</option> " \
+                                   "</select></div>"
+
+
+def test_minify_leaves_protected_blocks():
+    html = "<div>\n<!-- note -->\n<pre>a\n  b</pre>\n<script>var  a = 1;</script></div>"
+    assert hp.minify_html(html) == "<div> <pre>a\n  b</pre> <script>var  a = 1;</script></div>"
+
+
+def test_export_writes_manifest(tmp_path):
+    template = tmp_path / "template.html"
+    template.write_text("<div id=\"items\">\n  <p>Item</p>\n</div>")
+    edit_obj = hp.Editable(str(template))
+    output = str(tmp_path / "output.html")
+    fingerprinted = edit_obj.export(output, minify=True, compress=True, fingerprint=True)
+
+    assert fingerprinted != output
+    with open(str(tmp_path / "output.manifest.json")) as in_file:
+        manifest = json.load(in_file)
+    assert manifest["output.html"] == os.path.basename(fingerprinted)
+    assert manifest["output.html.gz"] == os.path.basename(fingerprinted) + ".gz"
+    with open(fingerprinted, "rb") as in_file:
+        data = in_file.read()
+    assert gzip.decompress(open(fingerprinted + ".gz", "rb").read()) == data
+    assert data == b"<div id=\"items\"><p>Item</p></div>"
+
+
+def test_export_removes_old_fingerprinted_files(tmp_path):
+    template = tmp_path / "template.html"
+    template.write_text("<div id=\"items\"></div>")
+    edit_obj = hp.Editable(str(template))
+    output = str(tmp_path / "output.html")
+    old = edit_obj.export(output, compress=True, fingerprint=True)
+    # Exporting the same contents again keeps the current files
+    assert edit_obj.export(output, compress=True, fingerprint=True) == old
+    assert os.path.exists(old) and os.path.exists(old + ".gz")
+
+    hp.insert(edit_obj.get_tag("items"), hp.make_tag("<p>New</p>"))
+    new = edit_obj.export(output, compress=True, fingerprint=True)
+    assert new != old
+    assert not os.path.exists(old) and not os.path.exists(old + ".gz")
+    assert os.path.exists(new) and os.path.exists(new + ".gz")
+    assert os.path.exists(str(template))
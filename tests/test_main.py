@@ -0,0 +1,17 @@
+import main
+
+
+def test_help_starts_within_budget_without_heavy_modules():
+    elapsed, loaded = main.measure_startup("help")
+    assert loaded == []
+    assert elapsed < main.STARTUP_BUDGET
+
+
+def test_make_does_not_load_selenium():
+    _, loaded = main.measure_startup("make", "archive")
+    assert "pandas" in loaded
+    assert "selenium" not in loaded
+
+
+def test_startup_report_passes():
+    assert main.startup_report()
@@ -0,0 +1,57 @@
+import json
+import os
+
+import pytest
+
+import sites
+
+here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_config(tmp_path, site_list):
+    path = tmp_path / "sites.json"
+    path.write_text(json.dumps({"cpus": 2, "sites": site_list}))
+    return str(path)
+
+
+def test_csv_and_output_default_to_the_site_name(tmp_path):
+    loaded, _, _ = sites.load_sites(write_config(tmp_path, [{"name": "a"}, {"name": "b"}]))
+    assert [(site["csv"], site["output"]) for site in loaded] == [("a.csv", "a.html"), ("b.csv", "b.html")]
+
+
+def test_duplicate_paths_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        sites.load_sites(write_config(tmp_path, [{"name": "a", "csv": "x.csv"}, {"name": "b", "csv": "x.csv"}]))
+
+
+def test_missing_csv_does_not_stop_other_sites(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    good = {"name": "good", "scrape": False, "csv": os.path.join(here, "All_of_Civic_Web.csv"),
+            "master_html": os.path.join(here, "Blank.html"), "output": str(tmp_path / "good.html")}
+    missing = {"name": "missing", "scrape": False, "csv": str(tmp_path / "missing.csv")}
+    outputs = sites.build_all(write_config(tmp_path, [missing, good]))
+    assert outputs == {"good": str(tmp_path / "good.html")}
+    assert os.path.exists(outputs["good"])
+
+
+def test_failed_crawl_quits_the_driver(monkeypatch):
+    import scrape_civicweb as sc
+
+    quits = []
+
+    class Driver:
+        def quit(self):
+            quits.append(True)
+
+    class FailingCivicWeb:
+        def __init__(self, *args, **kwargs):
+            self.driver = Driver()
+
+        def get_files(self, root_urls):
+            raise RuntimeError("crawl failed")
+
+    monkeypatch.setattr(sc, "CivicWeb", FailingCivicWeb)
+    site = dict(sites.site_defaults, name="a", csv="a.csv", driver_path=None)
+    with pytest.raises(RuntimeError):
+        sites.crawl_site(site)
+    assert quits == [True]
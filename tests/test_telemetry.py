@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+import telemetry as tm
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(tm.time, "perf_counter", clock)
+    return clock
+
+
+def test_histogram_buckets_are_upper_bounds():
+    histogram = tm.Histogram((0.1, 1))
+    for seconds in (0.05, 0.1, 0.5, 1, 3):
+        histogram.add(seconds)
+    result = histogram.to_dict()
+    assert result["buckets"] == {"le_0.1": 2, "le_1": 2, "inf": 1}
+    assert (result["count"], result["max"]) == (5, 3)
+    assert result["mean"] == pytest.approx(4.65 / 5)
+
+
+def test_estimated_departments_uses_the_visited_years():
+    telemetry = tm.CrawlTelemetry(None)
+    telemetry.add_years(4)
+    assert telemetry.estimated_departments() == 0
+    telemetry.year_done(3)
+    telemetry.year_done(1)
+    # 2 departments per visited year and 2 years left
+    assert telemetry.estimated_departments() == 8
+
+
+def test_eta_from_the_finished_departments(clock, capsys):
+    telemetry = tm.CrawlTelemetry(None)
+    telemetry.add_years(2)
+    telemetry.year_done(4)
+    assert telemetry.eta() is None
+    clock.now += 10
+    telemetry.department_done()
+    telemetry.department_done()
+    # 5 seconds per department, 6 estimated departments left
+    assert telemetry.eta() == 30
+    assert "2/8 folders (1/2 years)" in capsys.readouterr().out
+
+
+def test_timeouts_are_counted_per_folder(clock, tmp_path, capsys):
+    path = str(tmp_path / "metrics.jsonl")
+    telemetry = tm.CrawlTelemetry(path, "root")
+    telemetry.load("a", "department", 0.5)
+    telemetry.timeout(1.0)
+    telemetry.timeout(1.0)
+    telemetry.documents(3, 2)
+    telemetry.page_done()
+    telemetry.load("b", "department", 0.5)
+    telemetry.timeout(1.0)
+    telemetry.page_done()
+    clock.now += 5
+    summary = telemetry.summary()
+
+    assert telemetry.folders == {"a": {"timeouts": 2, "found": 3, "kept": 2},
+                                 "b": {"timeouts": 1, "found": 0, "kept": 0}}
+    assert summary["timeouts"] == 3
+    assert summary["pages_per_second"] == 2 / 5
+    # The refreshes are part of the load latency
+    assert summary["load_latency"]["max"] == 2.5
+    with open(path) as in_file:
+        lines = [json.loads(line) for line in in_file]
+    assert [line["event"] for line in lines] == ["page", "page", "summary"]
+    assert lines[0]["timeouts"] == 2 and lines[0]["source"] == "root"